@@ -0,0 +1,7 @@
+"""Make the repo-root scripts importable however pytest is invoked."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "tools")]
@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+import types
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+try:
+    import yfinance  # noqa: F401
+except ImportError:
+    # fetch_prices exits without yfinance; every test stubs yf.download anyway
+    sys.modules["yfinance"] = types.ModuleType("yfinance")
+
+import fetch_prices
+
+TICKERS = [info["ticker"] for info in fetch_prices.INSTRUMENTS.values()]
+DATES = pd.to_datetime(["2026-10-08", "2026-10-09", "2026-10-12", "2026-10-13"])
+
+
+def multi_frame(closes, index=DATES):
+    """Batch-shaped response: (Price, Ticker) MultiIndex columns."""
+    cols = pd.MultiIndex.from_product([["Close", "Open"], list(closes)], names=["Price", "Ticker"])
+    frame = pd.DataFrame(np.nan, index=index, columns=cols)
+    for ticker, values in closes.items():
+        frame[("Close", ticker)] = values
+        frame[("Open", ticker)] = 1.0
+    return frame
+
+
+def flat_frame(values, index=DATES):
+    """Single-ticker response from older yfinance: flat columns."""
+    return pd.DataFrame({"Close": values, "Open": 1.0}, index=index)
+
+
+def default_closes(skip=()):
+    return {t: ([np.nan] * len(DATES) if t in skip else [100.0, 101.0, 102.0, 104.0]) for t in TICKERS}
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_prices, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def stub_download(monkeypatch):
+    """Serve yf.download from a list of responses and record the tickers asked for."""
+    calls = []
+
+    def install(*responses):
+        queue = list(responses)
+
+        def download(tickers, **kwargs):
+            calls.append(list(tickers))
+            return queue.pop(0)
+
+        monkeypatch.setattr(fetch_prices.yf, "download", download, raising=False)
+        return calls
+
+    return install
+
+
+def test_complete_batch_makes_one_call(stub_download):
+    calls = stub_download(multi_frame(default_closes()))
+
+    results = fetch_prices.fetch_all(use_cache=False)
+
+    assert calls == [TICKERS]
+    assert results["DXY"]["price"] == 104.0
+    assert results["DXY"]["prev_close"] == 102.0
+
+
+def test_missing_tickers_retried_in_one_multiindex_batch(stub_download):
+    later = pd.to_datetime(["2026-10-13", "2026-10-14"])
+    calls = stub_download(
+        multi_frame(default_closes(skip={"GC=F", "^TNX"})),
+        multi_frame({"GC=F": [5100.0, 5170.0], "^TNX": [4.1, 4.05]}, index=later),
+    )
+
+    results = fetch_prices.fetch_all(use_cache=False)
+
+    assert calls == [TICKERS, ["GC=F", "^TNX"]]
+    assert results["XAU/USD"]["price"] == 5170
+    assert results["XAU/USD"]["prev_close"] == 5100
+    assert results["XAU/USD"]["date"] == "2026-10-14"
+    assert results["US10Y"]["direction"] == "down"
+    # Tickers from the first batch keep their own latest bar after the merge
+    assert results["DXY"]["date"] == "2026-10-13"
+
+
+def test_single_missing_ticker_flat_retry(stub_download):
+    calls = stub_download(
+        multi_frame(default_closes(skip={"GC=F"})),
+        flat_frame([5000.0, 5050.0, 5100.0, 5170.0]),
+    )
+
+    results = fetch_prices.fetch_all(use_cache=False)
+
+    assert len(calls) == 2 and calls[1] == ["GC=F"]
+    assert results["XAU/USD"]["price"] == 5170
+    assert results["XAU/USD"]["date"] == "2026-10-13"
+
+
+def test_ticker_missing_after_retry_is_an_error(stub_download):
+    calls = stub_download(multi_frame(default_closes(skip={"GC=F"})), pd.DataFrame())
+
+    results = fetch_prices.fetch_all(use_cache=False)
+
+    assert len(calls) == 2
+    assert "error" in results["XAU/USD"]
+    assert "error" not in results["DXY"]
+
+
+def test_cache_hit_within_ttl_skips_download(stub_download):
+    calls = stub_download(multi_frame(default_closes()))
+    first = fetch_prices.fetch_all()
+
+    assert fetch_prices.fetch_all() == first
+    assert len(calls) == 1
+
+
+def test_expired_cache_entry_refetches(stub_download):
+    calls = stub_download(multi_frame(default_closes()), multi_frame(default_closes()))
+    fetch_prices.fetch_all()
+    path = fetch_prices.cache_path(TICKERS)
+    stale = time.time() - fetch_prices.CACHE_TTL - 1
+    os.utime(path, (stale, stale))
+
+    fetch_prices.fetch_all()
+
+    assert len(calls) == 2
+
+
+def test_no_cache_flag_bypasses_cache(stub_download, monkeypatch, capsys):
+    calls = stub_download(multi_frame(default_closes()), multi_frame(default_closes()))
+    fetch_prices.fetch_all()
+    monkeypatch.setattr(sys, "argv", ["fetch_prices.py", "--csv", "--no-cache"])
+
+    fetch_prices.main()
+
+    assert len(calls) == 2
+    assert capsys.readouterr().out.startswith("instrument,price")
+
+
+def test_run_with_errors_is_not_cached(stub_download):
+    calls = stub_download(
+        multi_frame(default_closes(skip={"GC=F"})), pd.DataFrame(),
+        multi_frame(default_closes()),
+    )
+    assert "error" in fetch_prices.fetch_all()["XAU/USD"]
+    assert not os.path.exists(fetch_prices.cache_path(TICKERS))
+
+    assert "error" not in fetch_prices.fetch_all()["XAU/USD"]
+    assert len(calls) == 3
+
+
+def test_last_two_valid_closes_match_dropna(stub_download):
+    closes = default_closes()
+    closes["DX-Y.NYB"] = [100.0, 101.0, 103.0, np.nan]   # no bar on the last date
+    closes["EURUSD=X"] = [1.10, np.nan, 1.12, 1.11]      # gap before the last bar
+    closes["BTC-USD"] = [np.nan, np.nan, np.nan, 60000.0]  # a single value
+    calls = stub_download(multi_frame(closes))
+
+    results = fetch_prices.fetch_all(use_cache=False)
+
+    assert len(calls) == 1
+    for name, ticker in (("DXY", "DX-Y.NYB"), ("EUR/USD", "EURUSD=X")):
+        series = pd.Series(closes[ticker], index=DATES).dropna()
+        decimals = fetch_prices.INSTRUMENTS[name]["decimals"]
+        assert results[name]["price"] == round(series.iloc[-1], decimals)
+        assert results[name]["prev_close"] == round(series.iloc[-2], decimals)
+        assert results[name]["date"] == str(series.index[-1].date())
+    assert results["EUR/USD"]["direction"] == "down"
+    assert results["BTC/USD"] == {"error": "Insufficient data"}
+
+
+def test_all_nan_ticker_is_insufficient(stub_download):
+    stub_download(multi_frame(default_closes(skip={"^VIX"})), multi_frame({"^VIX": [np.nan] * len(DATES)}))
+
+    results = fetch_prices.fetch_all(use_cache=False)
+
+    assert results["VIX"] == {"error": "Insufficient data"}
+    assert "error" not in results["DXY"]
+
+
+def test_empty_response_gives_error_per_instrument(stub_download):
+    calls = stub_download(pd.DataFrame(), pd.DataFrame())
+
+    results = fetch_prices.fetch_all(use_cache=False)
+
+    assert len(calls) == 2
+    assert all("error" in r for r in results.values())
+    assert set(results) == set(fetch_prices.INSTRUMENTS)
+
+
+def test_non_datetime_index_is_an_error_per_instrument(stub_download):
+    stub_download(multi_frame(default_closes(), index=pd.Index(["a", "b", "c", "d"])))
+
+    results = fetch_prices.fetch_all(use_cache=False)
+
+    assert set(results) == set(fetch_prices.INSTRUMENTS)
+    assert all("error" in r for r in results.values())
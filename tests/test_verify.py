@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+import verify
+
+
+def baseline_hash(body):
+    """Canonical hash as computed in str mode by the original verifier."""
+    text = re.sub(r'<[^>]+>', '', body)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def write_article(path, body):
+    digest = baseline_hash(body)
+    path.write_text(f'<html><article data-hash="{digest}">{body}</article></html>', encoding='utf-8')
+    return digest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(verify, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+@pytest.mark.parametrize("body", [
+    "<p>Buy EUR/USD</p>",
+    "\u3000<b>Gold</b>\u00a0above 5,170\u2009",
+    "a\x1cb\x85c",
+    "<p>one</p>\n\t<p>two</p>",
+])
+@pytest.mark.parametrize("chunk_size", [1, 3, 64 * 1024])
+def test_unicode_whitespace_matches_baseline(tmp_path, monkeypatch, body, chunk_size):
+    monkeypatch.setattr(verify, "CHUNK_SIZE", chunk_size)
+    path = tmp_path / "signal.html"
+    digest = write_article(path, body)
+
+    _, published, computed, status = verify.verify(str(path))
+
+    assert status == "VERIFIED"
+    assert computed == published == digest
+
+
+def tamper_keeping_stat(path):
+    """Same-length edit with the mtime restored, invisible to the cache key."""
+    st = path.stat()
+    path.write_text(path.read_text(encoding='utf-8').replace("Buy", "Sel"), encoding='utf-8')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def test_verify_ignores_cache_by_default(tmp_path):
+    path = tmp_path / "signal.html"
+    write_article(path, "<p>Buy EUR/USD</p>")
+    assert verify.verify(str(path), use_cache=True)[3] == "VERIFIED"
+
+    tamper_keeping_stat(path)
+
+    assert verify.verify(str(path))[3] == "MISMATCH"
+
+
+def test_opt_in_cache_trusts_file_metadata(tmp_path):
+    # Known limitation, and the reason the cache is opt-in only
+    path = tmp_path / "signal.html"
+    write_article(path, "<p>Buy EUR/USD</p>")
+    verify.verify(str(path), use_cache=True)
+
+    tamper_keeping_stat(path)
+
+    assert verify.verify(str(path), use_cache=True)[3] == "VERIFIED"
+
+
+def test_all_checks_from_scratch_without_cache_flag(tmp_path):
+    path = tmp_path / "signal-20260101.html"
+    write_article(path, "<p>Buy EUR/USD</p>")
+    tamper_keeping_stat(path)
+
+    out = subprocess.run([sys.executable, verify.__file__, "--all"], cwd=tmp_path,
+                         capture_output=True, text=True, check=True).stdout
+
+    assert "signal-20260101.html: MISMATCH" in out
+
+
+def test_cache_entry_from_other_version_is_ignored(tmp_path):
+    path = tmp_path / "signal.html"
+    write_article(path, "<p>Buy EUR/USD</p>")
+    st = path.stat()
+    os.makedirs(verify.CACHE_DIR)
+    with open(verify.cache_path(str(path)), "w", encoding="utf-8") as f:
+        json.dump({"version": verify.CACHE_VERSION - 1, "mtime_ns": st.st_mtime_ns,
+                   "size": st.st_size, "computed": "0" * 64}, f)
+
+    assert verify.read_cache(str(path), st) is None
+    assert verify.verify(str(path), use_cache=True)[3] == "VERIFIED"
+
+
+def test_article_tag_hash_wins_over_earlier_data_hash(tmp_path):
+    path = tmp_path / "signal.html"
+    body = "<p>Buy EUR/USD</p>"
+    digest = baseline_hash(body)
+    path.write_text(f'<meta data-hash="{"a" * 64}"><article data-hash="{digest}">{body}</article>',
+                    encoding='utf-8')
+
+    assert verify.verify(str(path))[1:] == (digest, digest, "VERIFIED")
@@ -9,21 +9,38 @@ Usage:
     python3 fetch_prices.py              # Current / last close
     python3 fetch_prices.py --json       # Output as JSON for automation
     python3 fetch_prices.py --csv        # Output as CSV
+    python3 fetch_prices.py --no-cache   # Ignore results cached in the last minute
 
 Requires: pip install yfinance requests
+Optional: pip install orjson   # faster --json output
 """
 
 import argparse
+import hashlib
 import json
+import os
 import sys
+import tempfile
+import time
 from datetime import datetime, timedelta
 
 try:
+    import numpy as np
+    import pandas as pd
     import yfinance as yf
 except ImportError:
     print("ERROR: yfinance not installed. Run: pip install yfinance")
     sys.exit(1)
 
+try:
+    import orjson
+
+    def dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def dumps(obj):
+        return json.dumps(obj, indent=2)
+
 # ═══════════════════════════════════════════════════════════
 # INSTRUMENT MAP
 # ═══════════════════════════════════════════════════════════
@@ -45,106 +62,197 @@ INSTRUMENTS = {
     "BTC/USD": {"ticker": "BTC-USD",   "decimals": 0, "category": "supplementary"},
 }
 
+CATEGORY_LABELS = {
+    "primary": "▌ PRIMARY (Price Strip)",
+    "secondary": "▌ SECONDARY (Extended Table)",
+    "supplementary": "▌ SUPPLEMENTARY",
+}
+# Instrument names grouped by category, in table order
+BY_CATEGORY = {c: [n for n, i in INSTRUMENTS.items() if i["category"] == c] for c in CATEGORY_LABELS}
+
+# Back-to-back runs (e.g. --json then --csv) reuse results younger than this
+CACHE_DIR = os.path.expanduser("~/.cache/mufx")
+CACHE_TTL = 60  # seconds
+
+# Direction lookup tables, indexed 0=down, 1=flat, 2=up
+DIRS = ("down", "flat", "up")
+ARROWS = ("▼", "●", "▲")
+DOTS = ("🔴", "🟡", "🟢")
+DIR_INDEX = {d: i for i, d in enumerate(DIRS)}
+
+
+def download(tickers):
+    """Batch-download 5 days of daily bars for the given tickers."""
+    return yf.download(
+        tickers,
+        period="5d",
+        interval="1d",
+        progress=False,
+        auto_adjust=True,
+    )
+
+
+def close_frame(data, tickers):
+    """Close prices with one column per ticker, whatever shape yfinance returned."""
+    if isinstance(data.columns, pd.MultiIndex):
+        if "Close" not in data.columns.get_level_values(0):
+            return pd.DataFrame(index=data.index)
+        return data["Close"]
+    if "Close" not in data.columns:
+        return pd.DataFrame(index=data.index)
+    # Older yfinance returns flat columns for a single-ticker download
+    return data[["Close"]].set_axis(tickers, axis=1)
+
+
+def cache_path(tickers):
+    """Cache file for today's daily bars of this ticker set."""
+    key = repr((datetime.now().date().isoformat(), sorted(tickers), "1d"))
+    return os.path.join(CACHE_DIR, f"prices-{hashlib.sha1(key.encode()).hexdigest()}.json")
 
-def fetch_all():
+
+def load_cached(path):
+    """Return cached results if written within CACHE_TTL, else None."""
+    try:
+        if time.time() - os.stat(path).st_mtime >= CACHE_TTL:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(path, results):
+    """Atomically write results to the cache; failures are ignored."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(results, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def fetch_all(use_cache=True):
     """Fetch latest prices for all instruments."""
     results = {}
     tickers = {name: info["ticker"] for name, info in INSTRUMENTS.items()}
     
+    path = cache_path(tickers.values())
+    if use_cache:
+        cached = load_cached(path)
+        if cached is not None:
+            return cached
+    
     # Batch download — single API call for all tickers
     print("Fetching market data...\n", file=sys.stderr)
-    data = yf.download(
-        list(tickers.values()),
-        period="5d",
-        interval="1d",
-        progress=False,
-        auto_adjust=True,
-    )
+    batch = list(tickers.values())
+    prices = close_frame(download(batch), batch)
+    
+    # One batched retry for whatever the first call did not return
+    missing = [t for t in batch if t not in prices.columns or prices[t].dropna().empty]
+    if missing:
+        retry = close_frame(download(missing), missing)
+        prices = prices.drop(columns=missing, errors="ignore").join(retry, how="outer")
+    
+    # Last two valid closes per ticker, computed on the raw array at once
+    prices = prices.reindex(columns=batch)
+    col_idx = {t: i for i, t in enumerate(prices.columns)}
+    closes_arr = prices.to_numpy(dtype=float)
+    valid = ~np.isnan(closes_arr)
+    counts = valid.sum(axis=0).tolist()
+    currents, prev_closes, changes, dir_idx, last_stamps = [], [], [], [], []
+    if len(closes_arr):
+        rows = len(closes_arr) - 1
+        remaining = valid[::-1].cumsum(axis=0)[::-1]
+        last_row = rows - valid[::-1].argmax(axis=0)
+        prev_row = rows - (valid & (remaining >= 2))[::-1].argmax(axis=0)
+        cols = np.arange(closes_arr.shape[1])
+        cur_arr = closes_arr[last_row, cols]
+        prev_arr = closes_arr[prev_row, cols]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            chg_arr = (cur_arr - prev_arr) / prev_arr * 100
+        dir_idx = np.where(np.abs(chg_arr) < 0.01, 1, np.where(chg_arr > 0, 2, 0)).tolist()
+        currents, prev_closes, changes = cur_arr.tolist(), prev_arr.tolist(), chg_arr.tolist()
+        last_stamps = prices.index[last_row].tolist()
     
     for name, info in INSTRUMENTS.items():
         ticker = info["ticker"]
         decimals = info["decimals"]
         
         try:
-            # Get last two trading days
-            close_col = ("Close", ticker) if isinstance(data.columns, type(data.columns)) else "Close"
-            
-            try:
-                closes = data["Close"][ticker].dropna()
-            except (KeyError, TypeError):
-                # Fallback: fetch individually
-                single = yf.Ticker(ticker).history(period="5d")
-                closes = single["Close"].dropna()
-            
-            if len(closes) < 2:
+            i = col_idx[ticker]
+            if counts[i] < 2:
                 results[name] = {"error": "Insufficient data"}
                 continue
                 
-            current = closes.iloc[-1]
-            previous = closes.iloc[-2]
-            change_pct = ((current - previous) / previous) * 100
+            current = currents[i]
+            previous = prev_closes[i]
+            change_pct = changes[i]
             
-            # Direction
-            if abs(change_pct) < 0.01:
-                direction = "flat"
-                arrow = "●"
-            elif change_pct > 0:
-                direction = "up"
-                arrow = "▲"
-            else:
-                direction = "down"
-                arrow = "▼"
+            idx = dir_idx[i]
             
             results[name] = {
-                "price": round(float(current), decimals),
-                "prev_close": round(float(previous), decimals),
-                "change_pct": round(float(change_pct), 2),
+                "price": round(current, decimals),
+                "prev_close": round(previous, decimals),
+                "change_pct": round(change_pct, 2),
                 "change_str": f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%",
-                "direction": direction,
-                "arrow": arrow,
+                "direction": DIRS[idx],
                 "category": info["category"],
-                "date": str(closes.index[-1].date()),
+                "date": str(last_stamps[i].date()),
             }
             
         except Exception as e:
             results[name] = {"error": str(e), "category": info["category"]}
     
+    if not any("error" in r for r in results.values()):
+        save_cached(path, results)
     return results
 
 
 def print_table(results):
     """Pretty-print results as a terminal table."""
-    print(f"\n{'═' * 72}")
-    print(f"  muFX SIGNAL CHECK — PRICE DATA")
-    print(f"  Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'═' * 72}\n")
+    out = [
+        f"\n{'═' * 72}",
+        f"  muFX SIGNAL CHECK — PRICE DATA",
+        f"  Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"{'═' * 72}\n",
+    ]
     
-    for category in ["primary", "secondary", "supplementary"]:
-        label = {"primary": "▌ PRIMARY (Price Strip)", 
-                 "secondary": "▌ SECONDARY (Extended Table)",
-                 "supplementary": "▌ SUPPLEMENTARY"}[category]
-        print(f"  {label}")
-        print(f"  {'─' * 66}")
+    for category, names in BY_CATEGORY.items():
+        out.append(f"  {CATEGORY_LABELS[category]}")
+        out.append(f"  {'─' * 66}")
         
-        for name, data in results.items():
-            if data.get("category") != category:
-                continue
+        for name in names:
+            data = results[name]
             if "error" in data:
-                print(f"  {name:<12} ERROR: {data['error']}")
+                out.append(f"  {name:<12} ERROR: {data['error']}")
                 continue
             
             price_str = f"{data['price']:>12}" if data["price"] >= 100 else f"{data['price']:>12}"
-            chg_str = f"{data['arrow']} {data['change_str']:>8}"
-            dir_indicator = {"up": "🟢", "down": "🔴", "flat": "🟡"}[data["direction"]]
+            idx = DIR_INDEX[data["direction"]]
+            chg_str = f"{ARROWS[idx]} {data['change_str']:>8}"
+            dir_indicator = DOTS[idx]
             
-            print(f"  {name:<12} {price_str}   {chg_str}  {dir_indicator}   (prev: {data['prev_close']})")
+            out.append(f"  {name:<12} {price_str}   {chg_str}  {dir_indicator}   (prev: {data['prev_close']})")
         
-        print()
+        out.append("")
     
-    print(f"{'═' * 72}")
-    print(f"  Data date: {next(iter(results.values())).get('date', 'N/A')}")
-    print(f"  Source: Yahoo Finance via yfinance")
-    print(f"{'═' * 72}\n")
+    out.append(f"{'═' * 72}")
+    out.append(f"  Data date: {next(iter(results.values())).get('date', 'N/A')}")
+    out.append(f"  Source: Yahoo Finance via yfinance")
+    out.append(f"{'═' * 72}\n")
+    sys.stdout.write("\n".join(out) + "\n")
+
+
+def with_arrow(data):
+    """Copy of an instrument entry with the display arrow after its direction."""
+    out = {}
+    for key, value in data.items():
+        out[key] = value
+        if key == "direction":
+            out["arrow"] = ARROWS[DIR_INDEX[value]]
+    return out
 
 
 def print_json(results):
@@ -152,28 +260,31 @@ def print_json(results):
     output = {
         "generated": datetime.now().isoformat(),
         "source": "Yahoo Finance",
-        "instruments": results,
+        "instruments": {name: with_arrow(data) for name, data in results.items()},
     }
-    print(json.dumps(output, indent=2))
+    print(dumps(output))
 
 
 def print_csv(results):
     """Output as CSV."""
-    print("instrument,price,prev_close,change_pct,direction,category,date")
+    out = ["instrument,price,prev_close,change_pct,direction,category,date"]
     for name, data in results.items():
         if "error" in data:
-            print(f"{name},ERROR,,,,,")
+            out.append(f"{name},ERROR,,,,,")
             continue
-        print(f"{name},{data['price']},{data['prev_close']},{data['change_pct']},{data['direction']},{data['category']},{data['date']}")
+        out.append(f"{name},{data['price']},{data['prev_close']},{data['change_pct']},{data['direction']},{data['category']},{data['date']}")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def main():
     parser = argparse.ArgumentParser(description="muFX Daily Price Fetcher")
-    parser.add_argument("--json", action="store_true", help="Output as JSON")
-    parser.add_argument("--csv", action="store_true", help="Output as CSV")
+    fmt = parser.add_mutually_exclusive_group()
+    fmt.add_argument("--json", action="store_true", help="Output as JSON")
+    fmt.add_argument("--csv", action="store_true", help="Output as CSV")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch fresh data")
     args = parser.parse_args()
     
-    results = fetch_all()
+    results = fetch_all(use_cache=not args.no_cache)
     
     if args.json:
         print_json(results)
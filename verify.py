@@ -6,48 +6,175 @@ Verifies that article content matches the published SHA-256 hash.
 Usage:
   python3 verify.py signal-20260227.html
   python3 verify.py --all
+  python3 verify.py --all --cache
+
+Every file is hashed from scratch unless --all is given --cache, which
+reuses digests cached for files whose mtime and size are unchanged. The
+cache trusts file metadata, which can be forged, so only use it for quick
+local re-runs, never as the integrity check itself.
 """
 
-import re, hashlib, sys, os, glob
+import re, hashlib, sys, os, glob, mmap, json, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+TAG_RE = re.compile(rb'<[^>]+>')
+HASH_RE = re.compile(rb'data-hash="([a-f0-9]{64})"')
+
+# data-hash is injected on the opening <article> tag, so that tag wins over any
+# other data-hash in the page; then the footer, then the whole file
+TAIL = 8192
+CHUNK_SIZE = 64 * 1024
+
+# Hashing a typical article takes ~0.5 ms and starting a pool ~15 ms, so the
+# pool only pays off for larger batches on multi-core machines
+POOL_MIN_FILES = 64
+
+# Computed hashes keyed by (mtime_ns, size) so unchanged files skip strip + hash.
+# Bump CACHE_VERSION whenever the canonical text changes so old digests are dropped.
+CACHE_VERSION = 2
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".verify_cache")
+
+def cache_path(filename):
+    key = hashlib.sha1(os.path.abspath(filename).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, key + ".json")
+
+def read_cache(filename, st):
+    try:
+        with open(cache_path(filename), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (entry.get("version") == CACHE_VERSION
+            and entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size):
+        return entry.get("computed")
+    return None
 
-def verify(filename):
-    with open(filename, "r", encoding="utf-8") as f:
-        content = f.read()
+def write_cache(filename, st, computed):
+    entry = {"version": CACHE_VERSION, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "computed": computed}
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, cache_path(filename))
+    except OSError:
+        pass  # cache is best-effort
 
-    match = re.search(r'<article[^>]*>(.*?)</article>', content, re.DOTALL)
-    if not match:
-        return filename, None, None, "No <article> tag found"
+def stripped_chunks(mm, start, end):
+    """Yield tag-stripped pieces of mm[start:end].
 
-    text = re.sub(r'<[^>]+>', '', match.group(1))
-    text = re.sub(r'\s+', ' ', text).strip()
-    computed = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    Pieces are cut just after a '>' so no tag is split across two of them.
+    """
+    pos = start
+    while pos < end:
+        cut = min(pos + CHUNK_SIZE, end)
+        if cut < end:
+            gt = mm.rfind(b'>', pos, cut)
+            if gt == -1:
+                gt = mm.find(b'>', cut, end)
+            cut = gt + 1 if gt != -1 else end
+        yield TAG_RE.sub(b'', mm[pos:cut])
+        pos = cut
 
-    published = re.search(r'data-hash="([a-f0-9]{64})"', content)
-    published = published.group(1) if published else None
+def hash_article(mm, start, end):
+    """SHA-256 of the canonical article text, fed to the hasher piece by piece.
 
-    if not published:
-        return filename, None, computed, "No published hash found"
+    Each piece is decoded and collapsed with str.split(), which (like the
+    str-mode \\s+ that hash-articles.sh uses) also treats Unicode whitespace
+    such as NBSP as a separator. Pieces end just after a '>', so they are
+    always whole UTF-8 sequences. Runs that span two pieces are joined so
+    the result matches cleaning the whole body in one go.
+    Output is coalesced so each update() hands OpenSSL a full CHUNK_SIZE block.
+    """
+    h = hashlib.sha256()
+    buf = bytearray()
+    emitted = pending_ws = False
+    for piece in stripped_chunks(mm, start, end):
+        text = piece.decode("utf-8")
+        words = text.split()
+        if not words:
+            pending_ws = pending_ws or bool(text)
+            continue
+        if emitted and (pending_ws or text[:1].isspace()):
+            buf += b' '
+        buf += ' '.join(words).encode("utf-8")
+        emitted = True
+        pending_ws = text[-1:].isspace()
+        if len(buf) >= CHUNK_SIZE:
+            h.update(buf)
+            buf.clear()
+    h.update(buf)
+    return h.hexdigest()
+
+def find_published(mm, start, open_end):
+    """Published data-hash as str: the <article> tag's own, else the first found."""
+    size = len(mm)
+    m = (HASH_RE.search(mm, start, open_end)
+         or HASH_RE.search(mm, max(0, size - TAIL))
+         or HASH_RE.search(mm))
+    return m.group(1).decode('ascii') if m else None
+
+def verify(filename, use_cache=False):
+    with open(filename, "rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            return filename, None, None, "No <article> tag found"
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = mm.find(b'<article')
+            open_end = mm.find(b'>', start) + 1 if start != -1 else 0
+            end = mm.find(b'</article>', open_end) if open_end else -1
+            if end == -1:
+                return filename, None, None, "No <article> tag found"
+
+            # Nothing to compare against (e.g. drafts): skip the strip + hash
+            published = find_published(mm, start, open_end)
+            if not published:
+                return filename, None, None, "No published hash found"
+
+            computed = read_cache(filename, st) if use_cache else None
+            if computed is None:
+                computed = hash_article(mm, open_end, end)
+                if use_cache:
+                    write_cache(filename, st, computed)
 
     status = "VERIFIED" if computed == published else "MISMATCH"
     return filename, published, computed, status
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--all":
+    args = sys.argv[1:]
+    cache = "--cache" in args
+    args = [a for a in args if a != "--cache"]
+    use_cache = False
+    if args and args[0] == "--all":
         files = sorted(glob.glob("signal-*.html") + glob.glob("weekly-*.html") + glob.glob("q2-*.html"))
-    elif len(sys.argv) > 1:
-        files = [sys.argv[1]]
+        use_cache = cache
+    elif args:
+        files = [args[0]]
     else:
         print("Usage: python3 verify.py <filename.html>")
-        print("       python3 verify.py --all")
+        print("       python3 verify.py --all [--cache]")
         sys.exit(1)
 
+    missing = {f for f in files if not os.path.exists(f)}
+    found = [f for f in files if f not in missing]
+    workers = os.cpu_count() or 1
+    if workers > 1 and len(found) >= POOL_MIN_FILES:
+        chunksize = max(1, len(found) // (4 * workers))
+        with ProcessPoolExecutor() as ex:
+            results = dict(zip(found, ex.map(partial(verify, use_cache=use_cache), found, chunksize=chunksize)))
+    else:
+        results = {f: verify(f, use_cache) for f in found}
+
+    out = []
     for f in files:
-        if not os.path.exists(f):
-            print(f"  File not found: {f}")
+        if f in missing:
+            out.append(f"  File not found: {f}\n")
             continue
-        name, pub, comp, status = verify(f)
+        name, pub, comp, status = results[f]
         icon = "\u2705" if status == "VERIFIED" else "\u274c"
-        print(f"  {icon} {name}: {status}")
+        out.append(f"  {icon} {name}: {status}\n")
         if pub and comp and status == "MISMATCH":
-            print(f"     Published: {pub}")
-            print(f"     Computed:  {comp}")
+            out.append(f"     Published: {pub}\n")
+            out.append(f"     Computed:  {comp}\n")
+    sys.stdout.write("".join(out))